@@ -1,5 +1,6 @@
 # app.py
 import os
+import json
 import torch
 import logging
 from flask import Flask, render_template, request, redirect, url_for, flash
@@ -9,8 +10,8 @@ from datetime import datetime
 import PyPDF2
 from sqlalchemy.sql import func
 from config_loader import load_keys_from_file, device
-from summarizer import summarize_text, clean_text, get_summarizer_pipeline
-from image_generator import generate_image, translate_text, get_translation_models, get_image_pipeline
+from summarizer import summarize_text, summarize_text_incremental, clean_text, get_summarizer_pipeline
+from image_generator import generate_image, translate_text, get_translation_models, get_image_pipeline, build_image_prompt, image_exists, translate_text_cached, generate_image_cached
 import warnings
 
 # Tüm uyarıları görmezden gel
@@ -85,6 +86,24 @@ def create_app():
         def __repr__(self):
             return f'<Summary {self.title}>'
 
+    class TaleVersion(db.Model):
+        """
+        Yüklenen bir masalın sürümü. Masal düzenlenip tekrar yüklendiğinde
+        önceki sürümle karşılaştırılarak yalnızca değişen parçalar işlenir.
+        """
+        id = db.Column(db.Integer, primary_key=True)
+        title = db.Column(db.String(150), nullable=False, index=True)
+        version = db.Column(db.Integer, nullable=False, default=1)
+        model_name = db.Column(db.String(50), nullable=False)
+        summary_id = db.Column(db.Integer, db.ForeignKey('summary.id'), nullable=False)
+        source_text = db.Column(db.Text, nullable=False)
+        # Parça özetleri, çeviriler ve görsel prompt'ları (JSON)
+        cache = db.Column(db.Text, nullable=False, default='{}')
+        timestamp = db.Column(db.DateTime(timezone=True), server_default=func.now())
+
+        def __repr__(self):
+            return f'<TaleVersion {self.title} v{self.version}>'
+
     
     def save_summary_to_file(summary, filename):
         summaries_folder = 'summaries'
@@ -230,17 +249,44 @@ def create_app():
                     return redirect(request.url)
 
                 cleaned_text = clean_text(text)
-                introduction, development, conclusion = summarize_text(cleaned_text, summarizer_pipeline, tokenizer, max_input_length, logger)
+                file_base_name = os.path.splitext(filename)[0]
 
-                english_intro = translate_text(introduction, translation_model, translation_tokenizer)
-                english_dev = translate_text(development, translation_model, translation_tokenizer)
-                english_conc = translate_text(conclusion, translation_model, translation_tokenizer)
+                # Aynı masalın aynı modelle oluşturulmuş son sürümünü bul
+                previous_version = TaleVersion.query.filter_by(
+                    title=file_base_name, model_name=SUMMARY_MODEL_NAME
+                ).order_by(TaleVersion.version.desc()).first()
+
+                previous_cache = json.loads(previous_version.cache) if previous_version else {}
+                previous_translations = {}
+                if previous_cache.get('translation_model') == TRANSLATION_MODEL_NAME:
+                    previous_translations = previous_cache.get('translations', {})
+                previous_images = {}
+                if previous_cache.get('image_model') == IMAGE_MODEL_ID:
+                    previous_images = previous_cache.get('images', {})
+
+                # Metin ve modeller aynıysa, önceki sürüm hatasız tamamlandıysa ve
+                # tüm görseller hâlâ mevcutsa mevcut özeti göster
+                if (previous_version and previous_version.source_text == cleaned_text
+                        and previous_cache.get('complete')
+                        and previous_cache.get('translation_model') == TRANSLATION_MODEL_NAME
+                        and previous_cache.get('image_model') == IMAGE_MODEL_ID
+                        and all(image_exists(image.get('image')) for image in previous_images.values())):
+                    logger.info(f"'{file_base_name}' metni değişmemiş, mevcut özet gösteriliyor.")
+                    flash("Metin önceki sürümle aynı, mevcut özet gösteriliyor.")
+                    return redirect(url_for('summary', summary_id=previous_version.summary_id))
+
+                (introduction, development, conclusion), summary_state = summarize_text_incremental(
+                    cleaned_text, summarizer_pipeline, tokenizer, max_input_length, logger,
+                    previous_version.source_text if previous_version else None, previous_cache
+                )
 
-                file_base_name = os.path.splitext(filename)[0]
+                english_intro = translate_text_cached(introduction, translation_model, translation_tokenizer, previous_translations)
+                english_dev = translate_text_cached(development, translation_model, translation_tokenizer, previous_translations)
+                english_conc = translate_text_cached(conclusion, translation_model, translation_tokenizer, previous_translations)
 
-                img_intro = generate_image(english_intro, f"{file_base_name}_intro", pipe, IMAGE_MODEL_ID) or ""
-                img_dev = generate_image(english_dev, f"{file_base_name}_development", pipe, IMAGE_MODEL_ID) or ""
-                img_conc = generate_image(english_conc, f"{file_base_name}_conclusion", pipe, IMAGE_MODEL_ID) or ""
+                img_intro = generate_image_cached(english_intro, f"{file_base_name}_intro", pipe, IMAGE_MODEL_ID, previous_images.get('intro'))
+                img_dev = generate_image_cached(english_dev, f"{file_base_name}_development", pipe, IMAGE_MODEL_ID, previous_images.get('development'))
+                img_conc = generate_image_cached(english_conc, f"{file_base_name}_conclusion", pipe, IMAGE_MODEL_ID, previous_images.get('conclusion'))
 
                 new_summary = Summary(
                     title=file_base_name,
@@ -253,7 +299,42 @@ def create_app():
                     img_conclusion=img_conc
                 )
                 db.session.add(new_summary)
+                db.session.flush()
+
+                translated_sections = ((introduction, english_intro), (development, english_dev), (conclusion, english_conc))
+                # Çeviri hata verip metni aynen döndürdüyse önbelleğe alma
+                translations = {
+                    section_summary: english
+                    for section_summary, english in translated_sections
+                    if english != section_summary
+                }
+                new_cache = {
+                    'bounds': summary_state['bounds'],
+                    'chunks': summary_state['chunks'],
+                    # Özetleme, çeviri ve görsel üretimi hatasız tamamlandı mı
+                    'complete': (summary_state['complete']
+                                 and all(english != section_summary for section_summary, english in translated_sections)
+                                 and all((img_intro, img_dev, img_conc))),
+                    'translation_model': TRANSLATION_MODEL_NAME,
+                    'image_model': IMAGE_MODEL_ID,
+                    'translations': translations,
+                    'images': {
+                        'intro': {'prompt': build_image_prompt(english_intro), 'image': img_intro},
+                        'development': {'prompt': build_image_prompt(english_dev), 'image': img_dev},
+                        'conclusion': {'prompt': build_image_prompt(english_conc), 'image': img_conc},
+                    },
+                }
+                new_version = TaleVersion(
+                    title=file_base_name,
+                    version=previous_version.version + 1 if previous_version else 1,
+                    model_name=SUMMARY_MODEL_NAME,
+                    summary_id=new_summary.id,
+                    source_text=cleaned_text,
+                    cache=json.dumps(new_cache, ensure_ascii=False)
+                )
+                db.session.add(new_version)
                 db.session.commit()
+                logger.info(f"'{file_base_name}' sürüm {new_version.version} olarak kaydedildi.")
 
                 save_summary_to_file(new_summary, filename)
                 flash("Özet ve görseller başarıyla oluşturuldu!")
@@ -83,8 +83,8 @@ def translate_text(text, translation_model, translation_tokenizer):
         logger.error(f"Çeviri sırasında hata oluştu: {e}")
         return text  # Hata durumunda orijinal metni döndür
 
-def generate_image(english_summary, title, pipe, model_name):
-    """ İngilizce özet üzerinden görsel üretir ve kaydeder. """
+def build_image_prompt(english_summary):
+    """ İngilizce özetten, CLIP'in token sınırına göre kesilmiş diffusion prompt'unu oluşturur. """
     if not english_summary:
         logger.error("Görsel oluşturmak için geçerli bir metin yok.")
         return None
@@ -104,7 +104,13 @@ def generate_image(english_summary, title, pipe, model_name):
         tokens = tokens[:max_prompt_length]
         english_summary = clip_tokenizer.convert_tokens_to_string(tokens)
 
-    prompt = f"{base_prompt}{english_summary}"
+    return f"{base_prompt}{english_summary}"
+
+def generate_image(english_summary, title, pipe, model_name):
+    """ İngilizce özet üzerinden görsel üretir ve kaydeder. """
+    prompt = build_image_prompt(english_summary)
+    if not prompt:
+        return None
 
     try:
         if not pipe:
@@ -132,3 +138,26 @@ def generate_image(english_summary, title, pipe, model_name):
     except Exception as e:
         logger.error(f"Görsel oluşturma sırasında hata oluştu: {e}")
         return None
+
+def image_exists(image_url):
+    """ Kaydedilmiş görselin 'static' klasöründe hâlâ mevcut olup olmadığını kontrol eder. """
+    return bool(image_url) and os.path.exists(os.path.join('static', image_url))
+
+def translate_text_cached(text, translation_model, translation_tokenizer, previous_translations):
+    """ Özet önceki sürümde başarıyla çevrildiyse çeviriyi tekrar kullanır. """
+    if text in previous_translations:
+        logger.info("Bölüm özeti değişmemiş, önceki çeviri kullanılıyor.")
+        return previous_translations[text]
+    return translate_text(text, translation_model, translation_tokenizer)
+
+def generate_image_cached(english_summary, title, pipe, model_name, previous_image):
+    """
+    Diffusion'a gidecek (CLIP sınırına göre kesilmiş) prompt değişmediyse ve
+    görsel hâlâ mevcutsa önceki görseli kullanır.
+    """
+    prompt = build_image_prompt(english_summary)
+    if (prompt and previous_image and previous_image.get('prompt') == prompt
+            and image_exists(previous_image.get('image'))):
+        logger.info(f"'{title}' için prompt değişmemiş, önceki görsel kullanılıyor.")
+        return previous_image['image']
+    return generate_image(english_summary, title, pipe, model_name) or ""
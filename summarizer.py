@@ -1,6 +1,8 @@
 #summarizer.py
 import nltk
 import re
+import difflib
+import hashlib
 import logging
 import torch
 from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM, PegasusForConditionalGeneration, MT5Tokenizer, MT5ForConditionalGeneration, BartForConditionalGeneration, BertTokenizerFast, EncoderDecoderModel
@@ -20,25 +22,72 @@ def clean_text(text):
     text = re.sub(r'\s+', ' ', text)
     return text.strip()
 
-def split_into_sections_sentence_based(text, logger):
-    logger.info("Metin bölümlere ayrılıyor...")
-    """Metni giriş (%30), gelişme (%40) ve sonuç (%30) olarak böler."""
-    sentences = nltk.sent_tokenize(text)
-    total = len(sentences)
+# Parça boyutları (token)
+CHUNK_SIZE = 800
+MIN_CHUNK_SIZE = 400
+# Korunan bölüm sınırları yüzdelik sınırlardan toplam cümle sayısının bu oranından
+# fazla saparsa metin yeniden yüzdelere göre bölünür
+BOUNDARY_TOLERANCE = 0.15
 
+def _section_bounds(total):
+    """Giriş ve gelişme bölümlerinin bittiği cümle indekslerini döndürür."""
     if total < 4:
         # Çok kısa metinlerde eşit böl
-        return ' '.join(sentences[:1]), ' '.join(sentences[1:2]), ' '.join(sentences[2:])
+        return 1, 2
 
-    # Yüzdelere göre böl
+    # Yüzdelere göre böl: giriş %30, gelişme %40
     intro_end = 3 * (total // 10)
     dev_end = intro_end + 4 * (total // 10)
+    return intro_end, dev_end
+
+def split_into_sections_sentence_based(text, logger, previous_text=None, previous_bounds=None):
+    """
+    Metni giriş (%30), gelişme (%40) ve sonuç (%30) olarak böler.
+    Önceki sürümün metni ve bölüm sınırları verilirse cümleler eskileriyle
+    hizalanır ve eski sınırlar yüzdelik sınırlara yeterince yakınsa korunur.
+    Bölümleri cümle listeleri olarak, bölüm sınırlarıyla birlikte döndürür.
+    """
+    logger.info("Metin bölümlere ayrılıyor...")
+    sentences = nltk.sent_tokenize(text)
+    total = len(sentences)
+    intro_end, dev_end = _section_bounds(total)
+
+    if previous_text and previous_bounds and total >= 4:
+        previous_sentences = nltk.sent_tokenize(previous_text)
+        aligned = _align_section_bounds(previous_sentences, previous_bounds, sentences)
+        tolerance = BOUNDARY_TOLERANCE * total
+        if (aligned and 0 <= aligned[0] <= aligned[1] <= total
+                and abs(aligned[0] - intro_end) <= tolerance
+                and abs(aligned[1] - dev_end) <= tolerance):
+            intro_end, dev_end = aligned
+            logger.info("Önceki sürümün bölüm sınırları korunuyor.")
+        else:
+            logger.info("Bölüm sınırları çok kaydı, metin yeniden yüzdelere göre bölünüyor.")
 
     intro = sentences[:intro_end]  # İlk %30
     dev = sentences[intro_end:dev_end]  # Orta %40
     conc = sentences[dev_end:]  # Son %30
 
-    return ' '.join(intro), ' '.join(dev), ' '.join(conc)
+    return (intro, dev, conc), (intro_end, dev_end)
+
+def _align_section_bounds(previous_sentences, previous_bounds, sentences):
+    """Önceki sürümün bölüm sınırlarını yeni cümle listesindeki karşılıklarına taşır."""
+    opcodes = difflib.SequenceMatcher(None, previous_sentences, sentences, autojunk=False).get_opcodes()
+    bounds = tuple(_map_sentence_index(cut, opcodes) for cut in previous_bounds)
+    if None in bounds:
+        return None
+    return bounds
+
+def _map_sentence_index(index, opcodes):
+    # Değişmeyen bir blok içindeyse birebir eşle
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == 'equal' and i1 <= index <= i2:
+            return j1 + (index - i1)
+    # Değişen bir bloğun içindeyse bloğun sonuna taşı
+    for tag, i1, i2, j1, j2 in opcodes:
+        if i1 <= index <= i2:
+            return j2
+    return None
 
 def get_summarizer_pipeline(model_name, device, logger):
     """Belirtilen model ismiyle bir özetleme (veya text-generation) pipeline'ı döndürür."""
@@ -96,52 +145,150 @@ def summarize_text(text, summarizer_pipeline, tokenizer, max_input_length, logge
     """
     Metni (intro, dev, conc) olarak ayır ve her bölümü chunking ile özetle.
     """
+    summaries, _ = summarize_text_incremental(text, summarizer_pipeline, tokenizer, max_input_length, logger)
+    return summaries
+
+
+def summarize_text_incremental(text, summarizer_pipeline, tokenizer, max_input_length, logger,
+                               previous_text=None, previous_state=None):
+    """
+    Metni önceki sürümle karşılaştırarak özetler. Yalnızca önceki sürümde
+    özeti bulunmayan parçalar modele gönderilir.
+
+    (introduction, development, conclusion) ile birlikte bir sonraki sürüme
+    previous_state olarak verilecek durumu döndürür: bölüm sınırları
+    ('bounds'), kullanılan parça özetleri ('chunks') ve tüm parçaların
+    başarıyla özetlenip özetlenmediği ('complete').
+    """
+    previous_state = previous_state or {}
+
     # 1) Metni 3 parçaya ayıran fonksiyon:
-    intro_text, dev_text, conc_text = split_into_sections_sentence_based(text, logger)
+    sections, bounds = split_into_sections_sentence_based(
+        text, logger, previous_text, previous_state.get('bounds')
+    )
     
     logger.info("Metin giriş, gelişme ve sonuç bölümlerine ayrıldı.")
 
     # 2) Bölümleri özetle
-    introduction = summarize_section(intro_text, summarizer_pipeline, tokenizer, logger, 'introduction')
-    development = summarize_section(dev_text, summarizer_pipeline, tokenizer, logger, 'development')
-    conclusion = summarize_section(conc_text, summarizer_pipeline, tokenizer, logger, 'conclusion')
+    summaries = []
+    chunks = {}
+    complete = True
+    for sentences, section in zip(sections, ('introduction', 'development', 'conclusion')):
+        summary, section_chunks, section_complete = summarize_section(
+            sentences, summarizer_pipeline, tokenizer, logger, section, previous_state.get('chunks')
+        )
+        summaries.append(summary)
+        chunks.update(section_chunks)
+        complete = complete and section_complete
 
-    return introduction, development, conclusion
+    state = {'bounds': list(bounds), 'chunks': chunks, 'complete': complete}
+    return tuple(summaries), state
 
 
-def summarize_section(section_text, summarizer_pipeline, tokenizer, logger, section):
+def summarize_section(sentences, summarizer_pipeline, tokenizer, logger, section, previous_chunks=None):
     """
-    Tek bir bölümü chunking ile özetler.
+    Tek bir bölümü cümle tabanlı chunking ile özetler.
+    Özetle birlikte bölümde kullanılan parça özetlerini ve tüm parçaların
+    başarıyla özetlenip özetlenmediğini döndürür.
     """
+    section_text = ' '.join(sentences)
+
     # Token sayısı
-    tokens = tokenizer.encode(section_text, return_tensors='pt')
-    token_length = tokens.size(1)
+    lengths = [len(tokenizer.encode(sentence, add_special_tokens=False)) for sentence in sentences]
+    token_length = sum(lengths)
     logger.info(f"{section.capitalize()} bölümünün girdi token sayısı: {token_length}")
 
-    # Belirli bir chunk_size eşiği (örn. 800 veya 1024)
-    chunk_size = 800
-    if token_length <= chunk_size:
+    if token_length <= CHUNK_SIZE:
         # Kısa ise direkt özetle
-        return _summarize_chunk(section_text, summarizer_pipeline, tokenizer, logger, section)
+        chunk_texts = [section_text]
+        label = section
     else:
-        # Uzun ise parçalara böl
-        all_tokens = tokens[0]
-        chunk_summaries = []
-        for start_idx in range(0, token_length, chunk_size):
-            end_idx = start_idx + chunk_size
-            chunk_slice = all_tokens[start_idx:end_idx]
-            chunk_text = tokenizer.decode(chunk_slice, skip_special_tokens=True)
-            
-            # Parça özet
-            partial_summary = _summarize_chunk(
-                chunk_text, summarizer_pipeline, tokenizer, logger, f"{section}_partial"
-            )
-            chunk_summaries.append(partial_summary)
-
-        # Parça özetlerini birleştir
-        combined = " ".join(chunk_summaries)
-
-        return combined
+        # Uzun ise cümle sınırlarından parçalara böl
+        chunk_texts = _sentence_chunks(sentences, lengths, tokenizer)
+        label = f"{section}_partial"
+
+    chunk_summaries = []
+    chunks = {}
+    complete = True
+    for chunk_text in chunk_texts:
+        key = chunk_cache_key(chunk_text, label)
+        if previous_chunks and key in previous_chunks:
+            logger.info(f"{label.capitalize()} parçası değişmemiş, önceki özet kullanılıyor.")
+            partial_summary = previous_chunks[key]
+        else:
+            partial_summary = _summarize_chunk(chunk_text, summarizer_pipeline, tokenizer, logger, label)
+
+        # Özetleme hata verip metni aynen döndürdüyse önbelleğe alma
+        if partial_summary != chunk_text:
+            chunks[key] = partial_summary
+        else:
+            complete = False
+        chunk_summaries.append(partial_summary)
+
+    # Parça özetlerini birleştir
+    return " ".join(chunk_summaries), chunks, complete
+
+
+def _sentence_chunks(sentences, lengths, tokenizer):
+    """
+    Cümleleri en fazla CHUNK_SIZE tokenlik parçalara toplar. Parça taşacağı
+    zaman, MIN_CHUNK_SIZE ile CHUNK_SIZE arasında biten cümleler içinden
+    özeti (hash) en küçük olanın ardından kesilir. Sınır konuma değil cümle
+    içeriğine bağlı olduğundan bir düzenlemeden sonra parça sınırları
+    genellikle birkaç parça içinde önceki sürümle yeniden hizalanır.
+    """
+    chunks = []
+    current = []
+    for sentence, length in zip(sentences, lengths):
+        if length > CHUNK_SIZE:
+            if current:
+                chunks.append(' '.join(s for s, _ in current))
+                current = []
+            # Tek başına sınırı aşan cümleyi token dilimlerine böl
+            token_ids = tokenizer.encode(sentence, add_special_tokens=False)
+            for start_idx in range(0, length, CHUNK_SIZE):
+                chunk_slice = token_ids[start_idx:start_idx + CHUNK_SIZE]
+                chunks.append(tokenizer.decode(chunk_slice, skip_special_tokens=True))
+            continue
+
+        current.append((sentence, length))
+        while sum(l for _, l in current) > CHUNK_SIZE:
+            cut = _content_defined_cut(current)
+            chunks.append(' '.join(s for s, _ in current[:cut]))
+            current = current[cut:]
+
+    if current:
+        chunks.append(' '.join(s for s, _ in current))
+    return chunks
+
+
+def _content_defined_cut(current):
+    """Taşan parçada kaç cümleden sonra kesileceğini döndürür."""
+    candidates = []
+    fallback = 1
+    total = 0
+    for index, (sentence, length) in enumerate(current, start=1):
+        total += length
+        if total > CHUNK_SIZE:
+            break
+        fallback = index
+        if total >= MIN_CHUNK_SIZE:
+            candidates.append((_sentence_hash(sentence), index))
+
+    if not candidates:
+        # Hiçbir cümle aralıkta bitmiyorsa sığan en uzun parçayı al
+        return fallback
+    return min(candidates)[1]
+
+
+def _sentence_hash(sentence):
+    return hashlib.sha1(sentence.encode('utf-8')).hexdigest()
+
+
+def chunk_cache_key(text, section):
+    """Parça metni ve bölüm adından kararlı bir önbellek anahtarı üretir."""
+    digest = hashlib.sha1(text.encode('utf-8')).hexdigest()
+    return f"{section}:{digest}"
 
 
 def _summarize_chunk(text, summarizer_pipeline, tokenizer, logger, section):
@@ -0,0 +1,162 @@
+import logging
+
+import summarizer
+from summarizer import (
+    CHUNK_SIZE,
+    _map_sentence_index,
+    _sentence_chunks,
+    split_into_sections_sentence_based,
+    summarize_section,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class WordTokenizer:
+    """Her kelimeyi bir token sayan basit tokenizer."""
+
+    def encode(self, text, add_special_tokens=True, return_tensors=None):
+        return text.split()
+
+    def decode(self, ids, skip_special_tokens=True):
+        return ' '.join(ids)
+
+
+def make_sentences(count, words=6, start=0):
+    return [f"Sentence {i} " + ' '.join(f"w{i}x{k}" for k in range(words)) + '.'
+            for i in range(start, start + count)]
+
+
+def split(sentences, previous=None):
+    if previous is None:
+        return split_into_sections_sentence_based(' '.join(sentences), logger)
+    previous_sentences, previous_bounds = previous
+    return split_into_sections_sentence_based(
+        ' '.join(sentences), logger, ' '.join(previous_sentences), previous_bounds
+    )
+
+
+def chunks_of(sentences):
+    tokenizer = WordTokenizer()
+    lengths = [len(tokenizer.encode(sentence)) for sentence in sentences]
+    return _sentence_chunks(sentences, lengths, tokenizer)
+
+
+def test_map_sentence_index_inside_equal_block():
+    opcodes = [('equal', 0, 10, 0, 10), ('insert', 10, 10, 10, 13), ('equal', 10, 20, 13, 23)]
+    assert _map_sentence_index(5, opcodes) == 5
+    assert _map_sentence_index(10, opcodes) == 10
+    assert _map_sentence_index(15, opcodes) == 18
+
+
+def test_map_sentence_index_inside_changed_block():
+    opcodes = [('equal', 0, 4, 0, 4), ('replace', 4, 8, 4, 5), ('equal', 8, 10, 5, 7)]
+    assert _map_sentence_index(6, opcodes) == 5
+
+
+def test_split_uses_percentages_without_previous_version():
+    _, bounds = split(make_sentences(48))
+    assert bounds == (12, 28)
+
+
+def test_split_keeps_bounds_when_sentences_are_appended():
+    base = make_sentences(48)
+    _, bounds = split(base)
+    for extra in (1, 2, 5, 10):
+        sections, new_bounds = split(base + make_sentences(extra, start=100), (base, bounds))
+        assert new_bounds == (12, 28)
+        assert sections[0] == base[:12]
+        assert sections[1] == base[12:28]
+
+
+def test_split_keeps_bounds_on_typo():
+    base = make_sentences(48)
+    _, bounds = split(base)
+    edited = list(base)
+    edited[20] = edited[20].replace('w20x3', 'w20x3 typo')
+    _, new_bounds = split(edited, (base, bounds))
+    assert new_bounds == (12, 28)
+
+
+def test_split_deletion_at_section_cut():
+    base = make_sentences(48)
+    _, bounds = split(base)
+
+    # Girişin son cümlesi silinirse gelişme aynı cümleden başlar
+    without_last_intro = base[:11] + base[12:]
+    sections, new_bounds = split(without_last_intro, (base, bounds))
+    assert new_bounds == (11, 27)
+    assert sections[1] == base[12:28]
+
+    # Gelişmenin ilk cümlesi silinirse giriş değişmez
+    without_first_dev = base[:12] + base[13:]
+    sections, new_bounds = split(without_first_dev, (base, bounds))
+    assert new_bounds == (12, 27)
+    assert sections[0] == base[:12]
+
+
+def test_split_falls_back_to_percentages_on_large_drift():
+    base = make_sentences(48)
+    _, bounds = split(base)
+    _, new_bounds = split(base + make_sentences(40, start=100), (base, bounds))
+    assert new_bounds == (24, 56)
+
+
+def test_sentence_chunks_respect_size_and_sentence_boundaries():
+    sentences = make_sentences(300, words=30)
+    chunks = chunks_of(sentences)
+    assert len(chunks) > 1
+    assert all(len(chunk.split()) <= CHUNK_SIZE for chunk in chunks)
+    assert ' '.join(chunks) == ' '.join(sentences)
+    assert all(chunk.endswith('.') for chunk in chunks)
+
+
+def test_sentence_chunks_resync_after_typo():
+    sentences = make_sentences(300, words=30)
+    edited = list(sentences)
+    edited[40] = 'extra ' * 25 + edited[40]
+    changed = set(chunks_of(edited)) - set(chunks_of(sentences))
+    assert len(changed) <= 2
+
+
+def test_sentence_chunks_resync_after_insert():
+    sentences = make_sentences(300, words=30)
+    edited = sentences[:150] + make_sentences(1, words=30, start=1000) + sentences[150:]
+    changed = set(chunks_of(edited)) - set(chunks_of(sentences))
+    assert len(changed) <= 2
+
+
+def test_sentence_longer_than_chunk_size_is_sliced():
+    long_sentence = ' '.join(f"t{k}" for k in range(CHUNK_SIZE * 2 + 10)) + '.'
+    sentences = make_sentences(3) + [long_sentence] + make_sentences(3, start=10)
+    chunks = chunks_of(sentences)
+    assert chunks[0] == ' '.join(sentences[:3])
+    assert [len(chunk.split()) for chunk in chunks[1:4]] == [CHUNK_SIZE, CHUNK_SIZE, 10]
+    assert chunks[4] == ' '.join(sentences[4:])
+
+
+def test_summarize_section_reuses_previous_chunks(monkeypatch):
+    calls = []
+
+    def fake_summarize_chunk(text, summarizer_pipeline, tokenizer, logger, section):
+        calls.append(text)
+        return f"summary of {len(calls)}"
+
+    monkeypatch.setattr(summarizer, '_summarize_chunk', fake_summarize_chunk)
+    sentences = make_sentences(300, words=30)
+    _, chunks, complete = summarize_section(sentences, None, WordTokenizer(), logger, 'development')
+    assert complete
+    first_run = len(calls)
+
+    calls.clear()
+    edited = list(sentences)
+    edited[40] = 'extra ' * 25 + edited[40]
+    summarize_section(edited, None, WordTokenizer(), logger, 'development', chunks)
+    assert 0 < len(calls) <= 2 < first_run
+
+
+def test_summarize_section_does_not_cache_failed_chunks(monkeypatch):
+    monkeypatch.setattr(summarizer, '_summarize_chunk', lambda text, *args: text)
+    _, chunks, complete = summarize_section(make_sentences(3), None, WordTokenizer(), logger, 'introduction')
+    assert chunks == {}
+    assert not complete